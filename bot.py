@@ -2,15 +2,25 @@
 import os
 import telebot
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 
 from goodminton.courts import UnknownLocationError, Summary, Location
 from goodminton.filters import TimeRangeFilter, DurationFilter
-from goodminton.scraper import scrape_bookings, invert_bookings
+from goodminton.scraper import ScrapeError, scrape_bookings, invert_bookings
 
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 
-botminton = telebot.TeleBot(BOT_TOKEN)
+# Handlers run on telebot's worker pool, so other messages can be handled while a
+# slow `/poll` is running. No ordering between messages is guaranteed.
+botminton = telebot.TeleBot(BOT_TOKEN, num_threads=4)
+
+DEFAULT_LOCATIONS: tuple[Location, ...] = (Location.CLAYTON, Location.CAULFIELD)
+
+# Each poll scrapes on its own small pool so that one large poll cannot queue
+# ahead of polls from other chats, and the number of days per poll is capped.
+SCRAPE_WORKERS = 4
+MAX_DAYS = 14
 
 
 @botminton.message_handler(commands=["hello"])
@@ -21,35 +31,39 @@ def send_welcome(message):
 @botminton.message_handler(commands=["poll"])
 def create_poll(message):
     print(f"Recieved poll request: {message.text}")
-    args = {}
-    args.update([a.split("=") for a in message.text.split()[1:]])
+    # Tokens without an `=` are ignored rather than failing the whole request.
+    args = dict(tok.split("=", 1) for tok in message.text.split()[1:] if "=" in tok)
 
     # Parse date range
-    if "dates" not in args.keys():
+    datestr = args.get("dates")
+    if datestr is None:
         botminton.reply_to(
             message,
             "You need to supply a `dates` argument when using `/poll`, "
             + "e.g., `/poll dates=2024-08-16:2024-08-20`.",
         )
         return
-    datestr_start, datestr_end = args["dates"].split(":")
     try:
+        datestr_start, datestr_end = datestr.split(":")
         start = date.fromisoformat(datestr_start)
-        dates = [start]
         end = date.fromisoformat(datestr_end)
-        while start < end:
-            start += timedelta(days=1)
-            dates.append(start)
+        num_days = max((end - start).days, 0) + 1
+        dates = [start + timedelta(days=i) for i in range(num_days)]
     except ValueError as e:
         botminton.reply_to(
             message, f"An error occurred when trying to parse `dates` argument: {e}"
         )
         return
+    if len(dates) > MAX_DAYS:
+        botminton.reply_to(
+            message, f"The `dates` argument can span at most {MAX_DAYS} days."
+        )
+        return
 
     # Parse locations argument
-    if "location" in args.keys():
+    if (location := args.get("location")) is not None:
         try:
-            locations = [Location.from_str(args["location"])]
+            locations = (Location.from_str(location),)
         except UnknownLocationError as e:
             botminton.reply_to(
                 message,
@@ -57,26 +71,34 @@ def create_poll(message):
             )
             return
     else:
-        locations = [Location.from_str("clayton"), Location.from_str("caulfield")]
-
-    # Fetch availabilities
-    avails = [
-        avail
-        for avails in [
-            invert_bookings(scrape_bookings(loc, d.isoformat()))
-            for loc in locations
-            for d in dates
-        ]
-        for avail in avails
-    ]
-
-    # Parse timerange argument and filter
-    if "timerange" in args.keys():
-        avails = TimeRangeFilter.from_str(args["timerange"]).filter(avails)
-
-    # Parse minduration argument and filter
-    if "minduration" in args.keys():
-        avails = DurationFilter.from_str(args["minduration"]).filter(avails)
+        locations = DEFAULT_LOCATIONS
+
+    # Parse timerange argument
+    time_range = None
+    if (timerange := args.get("timerange")) is not None:
+        time_range = TimeRangeFilter.from_str(timerange)
+
+    # Parse minduration argument
+    duration = None
+    if (minduration := args.get("minduration")) is not None:
+        duration = DurationFilter.from_str(minduration)
+
+    # Fetch availabilities, scraping each (location, date) pair concurrently and
+    # filtering the availabilities as they are extracted.
+    with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as ex:
+        results = ex.map(
+            lambda p: invert_bookings(
+                scrape_bookings(*p), time_range=time_range, duration=duration
+            ),
+            [(loc, d.isoformat()) for loc in locations for d in dates],
+        )
+        try:
+            avails = [avail for avails in results for avail in avails]
+        except ScrapeError as e:
+            botminton.reply_to(
+                message, f"An error occurred when trying to read the bookings: {e}"
+            )
+            return
 
     # Compute summaries
     summaries = Summary.compute_list(avails)
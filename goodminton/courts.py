@@ -1,5 +1,5 @@
 # Data types for badminton court availabilities
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 from datetime import datetime, date, time
@@ -18,7 +18,7 @@ def format_time(t: time) -> str:
 def duration_hours(dt1: datetime, dt2: datetime) -> float:
     "Calculate duration in number of hours"
     td = abs(dt1 - dt2)
-    return td.seconds / (60 * 60)
+    return td.total_seconds() / (60 * 60)
 
 
 class UnknownLocationError(Exception):
@@ -39,20 +39,22 @@ class Location(Enum):
 
     @classmethod
     def from_str(cls, s):
-        if s.lower() == cls.CLAYTON.value.lower():
-            return cls.CLAYTON
-        elif s.lower() == cls.CAULFIELD.value.lower():
-            return cls.CAULFIELD
-        else:
+        try:
+            return _LOCATION_BY_NAME[s.lower()]
+        except KeyError:
             raise UnknownLocationError(
-                "Location not recognised. Expected one of 'clayton' or " "'caulfield'."
-            )
+                f"Location {s!r} not recognised. Expected one of 'clayton' or "
+                "'caulfield'."
+            ) from None
 
     def __str__(self):
         return self.value
 
 
-@dataclass
+_LOCATION_BY_NAME = {loc.value.lower(): loc for loc in Location}
+
+
+@dataclass(slots=True, frozen=True)
 class CourtBooking:
 
     "A dataclass for encoding times when a court is unavailable"
@@ -76,7 +78,7 @@ class CourtBooking:
         )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CourtAvailability:
 
     "A dataclass for encoding times when a court is available."
@@ -85,10 +87,12 @@ class CourtAvailability:
     court_name: str
     start: datetime
     end: datetime
+    duration: float = field(init=False, repr=False, compare=False)
 
-    @property
-    def duration(self) -> float:
-        return duration_hours(self.start, self.end)
+    def __post_init__(self):
+        # Computed once up front, as `Summary.compute_list` reads it per
+        # availability.
+        object.__setattr__(self, "duration", duration_hours(self.start, self.end))
 
     def __repr__(self):
         date = format_date(self.start.date())
@@ -100,7 +104,7 @@ class CourtAvailability:
         )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Summary:
 
     "A dataclass for storing summaries of availabilities."
@@ -114,27 +118,30 @@ class Summary:
 
     @classmethod
     def compute_list(cls, availabilities: list[CourtAvailability]):
-        summaries = []
-        locs = set([a.location for a in availabilities])
-        for loc in locs:
-            loc_availabilities = [a for a in availabilities if a.location == loc]
-            starts = set([a.start for a in loc_availabilities])
-            for s in starts:
-                s_loc_availabilities = [a for a in loc_availabilities if a.start == s]
-                num_courts = len(s_loc_availabilities)
-                max_duration = max([a.duration for a in s_loc_availabilities])
-                min_duration = min([a.duration for a in s_loc_availabilities])
-                summaries.append(
-                    cls(
-                        location=loc,
-                        date=s.date(),
-                        start=s.time(),
-                        num_courts=num_courts,
-                        max_duration=max_duration,
-                        min_duration=min_duration,
-                    )
-                )
-        return summaries
+        # Group by (location, start) in a single pass, tracking the number of
+        # courts and the longest and shortest durations for each group.
+        groups = {}
+        for a in availabilities:
+            key = (a.location, a.start)
+            group = groups.get(key)
+            duration = a.duration
+            if group is None:
+                groups[key] = [1, duration, duration]
+            else:
+                group[0] += 1
+                group[1] = max(group[1], duration)
+                group[2] = min(group[2], duration)
+        return [
+            cls(
+                location=loc,
+                date=s.date(),
+                start=s.time(),
+                num_courts=num_courts,
+                max_duration=max_duration,
+                min_duration=min_duration,
+            )
+            for (loc, s), (num_courts, max_duration, min_duration) in groups.items()
+        ]
 
     def __repr__(self):
         d = format_date(self.date)
@@ -1,8 +1,8 @@
 # Tools for filtering lists of court availabilities
-from datetime import datetime, time, timedelta
+from datetime import datetime, time
 from dataclasses import dataclass
 
-from goodminton.courts import CourtAvailability
+from goodminton.courts import duration_hours
 
 
 class InvalidTimeRangeError(Exception):
@@ -16,7 +16,7 @@ class InvalidTimeRangeError(Exception):
 @dataclass
 class TimeRangeFilter:
     """
-    Filter (and truncate) availabilities which match a specified time range.
+    A time range for truncating availabilities, applied by `filter_window`.
     """
 
     start: time | None = None
@@ -49,47 +49,48 @@ class TimeRangeFilter:
         else:
             raise InvalidTimeRangeError("Must specify either `start` or `end`.")
 
-    def filter(
-        self, availabilities: list[CourtAvailability]
-    ) -> list[CourtAvailability]:
+    def truncate(
+        self, start: datetime, end: datetime
+    ) -> tuple[datetime, datetime] | None:
         """
-        Filter a set of availabilities based on time.
-
-        :param availabilities: The list of availabilities to filter.
-        :type availabilities: list[CourtAvailability]
-        :return: A list of truncated availabilities in the time range.
-        :rtype: list[CourtAvailability]
+        Truncate a single time slot to the time range.
+
+        :param start: The start of the time slot.
+        :type start: datetime
+        :param end: The end of the time slot.
+        :type end: datetime
+        :return: The truncated start and end, or None if the slot does not
+                 overlap the time range.
+        :rtype: tuple[datetime, datetime] | None
         """
-        filtered = []
-        for avail in availabilities:
-            candidate = CourtAvailability(**avail.__dict__)
-            if self.start:
-                # Skip if avail ends before filter start
-                if self.start > avail.end.time():
-                    continue
-                # If avail starts before filter start, move start forward.
-                if avail.start.time() < self.start:
-                    candidate.start = datetime.combine(avail.start.date(), self.start)
-            if self.end:
-                # Skip if starts after filter ends
-                if self.end < avail.start.time():
-                    continue
-                # If avail ends after filter end, move the end back.
-                if avail.end.time() > self.end:
-                    candidate.end = datetime.combine(avail.end.date(), self.end)
-            # Final sanity check
-            if candidate.start < candidate.end:
-                filtered.append(candidate)
-        return filtered
+        if self.start:
+            # Skip if slot ends before filter start
+            if self.start > end.time():
+                return None
+            # If slot starts before filter start, move start forward.
+            if start.time() < self.start:
+                start = datetime.combine(start.date(), self.start)
+        if self.end:
+            # Skip if starts after filter ends
+            if self.end < start.time():
+                return None
+            # If slot ends after filter end, move the end back.
+            if end.time() > self.end:
+                end = datetime.combine(end.date(), self.end)
+        # Final sanity check
+        if start < end:
+            return start, end
+        return None
 
 
 @dataclass
 class DurationFilter:
     """
-    Filter availabilities which exceed some minimum duration.
+    A minimum duration for availabilities, applied by `filter_window`.
     """
 
-    min_duration: timedelta = timedelta(seconds=60 * 60)
+    # The minimum duration in hours, comparable with `CourtAvailability.duration`.
+    min_duration: float = 1.0
 
     @classmethod
     def from_str(cls, s: str):
@@ -101,15 +102,33 @@ class DurationFilter:
         """
         return cls(min_duration=float(s))
 
-    def filter(
-        self, availabilities: list[CourtAvailability]
-    ) -> list[CourtAvailability]:
-        """
-        Filter a set of availabilities based on duration.
 
-        :param availabilities: The list of availabilities to filter.
-        :type availabilities: list[CourtAvailability]
-        :return: A list of availabilities which exceed a minimum duration.
-        :rtype: list[CourtAvailability]
-        """
-        return [a for a in availabilities if a.duration >= self.min_duration]
+def filter_window(
+    start: datetime,
+    end: datetime,
+    time_range: TimeRangeFilter | None = None,
+    duration: DurationFilter | None = None,
+) -> tuple[datetime, datetime] | None:
+    """
+    Apply the filters to a single time slot.
+
+    :param start: The start of the time slot.
+    :type start: datetime
+    :param end: The end of the time slot.
+    :type end: datetime
+    :param time_range: An optional time range to truncate the slot to.
+    :type time_range: TimeRangeFilter | None
+    :param duration: An optional minimum duration for the (truncated) slot.
+    :type duration: DurationFilter | None
+    :return: The possibly truncated start and end, or None if the slot is
+             filtered out.
+    :rtype: tuple[datetime, datetime] | None
+    """
+    if time_range is not None:
+        window = time_range.truncate(start, end)
+        if window is None:
+            return None
+        start, end = window
+    if duration is not None and duration_hours(start, end) < duration.min_duration:
+        return None
+    return start, end
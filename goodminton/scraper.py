@@ -1,45 +1,100 @@
 # Tools for scraping the public Monash sport website for bookings.
-from bs4 import BeautifulSoup
-from urllib.request import urlopen
+import html
+import re
+import threading
+import time as clock
+
+from collections import defaultdict
 from datetime import datetime, date, time
 
-import tree_sitter_javascript as tsjs
-from tree_sitter import Language, Parser
+import requests
+from requests.adapters import HTTPAdapter
 
 from goodminton.courts import CourtBooking, CourtAvailability, Location
+from goodminton.filters import TimeRangeFilter, DurationFilter, filter_window
 
 
 URL_CAULFIELD = "https://www.mymonashsport.com.au/public/facility/iframe/753/1030/"
 URL_CLAYTON = "https://www.mymonashsport.com.au/public/facility/iframe/754/1018/"
 
-JS_LANG = Language(tsjs.language())
+# A shared session so that concurrent scrapes reuse pooled keep-alive connections
+# rather than paying for a fresh TCP/TLS handshake on every request. The pool is
+# sized for the bot's 4 handler threads each scraping with 4 workers.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Scraped bookings are cached per (location, date) for a few minutes. Bookings for
+# past dates can no longer change, so they are kept for much longer.
+CACHE_TTL = 5 * 60
+CACHE_TTL_PAST = 24 * 60 * 60
+CACHE_MAXSIZE = 512
+
+_CACHE: dict[tuple[Location, str], tuple[float, tuple[CourtBooking, ...]]] = {}
+_CACHE_LOCK = threading.Lock()
 
-COURT_BOOKINGS_QUERY = JS_LANG.query(
+
+class ScrapeError(Exception):
     """
-(
-    (pair
-        key: (property_identifier) @key-name
-        value: (array) @array
-    )
-    (#eq? @key-name "events")
-)
-"""
+    An exception to be raised when a scraped page does not have the expected
+    structure.
+    """
+
+    pass
+
+
+# The court names are the cells of the booking table (after the header cell), and
+# each court's bookings are listed in the page's fourth script as an
+# `events: [...]` array of alternating start and end
+# `new Date(Y, M, D, h, m, s)` expressions. The patterns operate on the raw
+# response bytes, so that only the court names need to be decoded.
+_TD_RE = re.compile(rb"<td[^>]*>(.*?)</td>", re.DOTALL)
+_TAG_RE = re.compile(rb"<[^>]*>")
+_SCRIPT_RE = re.compile(rb"<script[^>]*>(.*?)</script>", re.DOTALL)
+_EVENTS_RE = re.compile(rb"events\s*:\s*\[(.*?)\]", re.DOTALL)
+_DATE_RE = re.compile(
+    rb"new Date\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,"
+    rb"\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)"
 )
 
-DATES_QUERY = JS_LANG.query(
+
+def scrape_bookings(location: Location, date_iso: str) -> list[CourtBooking]:
     """
-(
-    (new_expression
-        constructor: (identifier) @name
-        arguments: (arguments) @args
-    )
-    (#eq? @name "Date")
-)
-"""
-)
+    Fetch all badminton bookings for the specified location and date, re-using
+    recently scraped results where possible.
+
+    :param location: The monash sport location
+    :type location: Location
+    :param date_iso: A date string in ISO format "YYYY-MM-DD"
+    :type date_iso: str
+    :return: A list of the court bookings on the specified date.
+    :rtype: list[CourtBooking]
+    """
+    key = (location, date_iso)
+    now = clock.monotonic()
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None and entry[0] > now:
+            return list(entry[1])
+
+    # Failed scrapes raise, so only successfully parsed pages are cached.
+    bookings = _scrape_bookings(location, date_iso)
+
+    if date.fromisoformat(date_iso) < date.today():
+        ttl = CACHE_TTL_PAST
+    else:
+        ttl = CACHE_TTL
+    with _CACHE_LOCK:
+        if len(_CACHE) >= CACHE_MAXSIZE:
+            # Drop expired entries, then the oldest if still full.
+            for k in [k for k, (expiry, _) in _CACHE.items() if expiry <= now]:
+                del _CACHE[k]
+            if len(_CACHE) >= CACHE_MAXSIZE:
+                del _CACHE[next(iter(_CACHE))]
+        _CACHE[key] = (now + ttl, tuple(bookings))
+    return bookings
 
 
-def scrape_bookings(location: Location, date_iso: str):
+def _scrape_bookings(location: Location, date_iso: str) -> list[CourtBooking]:
     """
     Fetch all badminton bookings for the specified location and date.
 
@@ -47,9 +102,8 @@ def scrape_bookings(location: Location, date_iso: str):
     :type location: Location
     :param date_iso: A date string in ISO format "YYYY-MM-DD"
     :type date_iso: str
-    :return: A dict with keys equal to the court names and values are
-             lists of dicts with keys 'start' and 'end' and datetime values.
-    :rtype: dict[str, list[dict[str, datetime]]]
+    :return: A list of the court bookings on the specified date.
+    :rtype: list[CourtBooking]
     """
     # Construct URL to scrape
     if location == Location.CLAYTON:
@@ -57,55 +111,46 @@ def scrape_bookings(location: Location, date_iso: str):
     elif location == Location.CAULFIELD:
         url = URL_CAULFIELD + date_iso
 
-    # Fetch the HTML
-    out = urlopen(url).readlines()
-    html = "".join([b.decode("UTF-8") for b in out])
-    soup = BeautifulSoup(html, features="html.parser")
+    # Fetch the HTML, failing on error responses rather than parsing them.
+    resp = SESSION.get(url, timeout=10)
+    resp.raise_for_status()
+    page = resp.content
 
-    # Parse the court names
+    # Parse the court names, keeping empty cells so the header offset holds.
     court_names = [
-        td.text.strip() for td in soup.findAll(lambda tag: tag.name == "td")
+        html.unescape(_TAG_RE.sub(b"", cell).decode("UTF-8")).strip()
+        for cell in _TD_RE.findall(page)
     ][1:]
-    court_id_to_names = {}
-    court_id_to_names.update(enumerate(court_names))
 
     # Get the script which populates the table
-    script = soup.findAll(lambda tag: tag.name == "script")[3].contents[0]
-
-    # Parse the javascript
-    parser = Parser(JS_LANG)
-    tree = parser.parse(script.encode("UTF-8"))
-    court_bookings_raw = [
-        o[1]["array"] for o in COURT_BOOKINGS_QUERY.matches(tree.root_node)
-    ]
+    scripts = _SCRIPT_RE.findall(page)
+    if len(scripts) < 4:
+        raise ScrapeError(f"Expected at least 4 scripts, found {len(scripts)}.")
+    court_events = _EVENTS_RE.findall(scripts[3])
+    if not court_events:
+        # Raising here also keeps an unexpected page out of the cache.
+        raise ScrapeError("No courts found on the page.")
+    # Extra cells are tolerated, as long as every booking list has a court name.
+    if len(court_events) > len(court_names):
+        raise ScrapeError(
+            f"Found {len(court_names)} courts but {len(court_events)} "
+            "lists of bookings."
+        )
+
+    day = date.fromisoformat(date_iso)
     bookings = []
-    for court_id, bookings_data in enumerate(court_bookings_raw):
-        # Extract the booking times
-        booking_times_raw = [
-            booking[1]["args"] for booking in DATES_QUERY.matches(bookings_data)
-        ]
-        # Convert list of integers to datetimes
+    for court_name, events in zip(court_names, court_events):
+        # Only the time of day is needed; the date is known from the request.
         booking_times = [
-            datetime.combine(
-                date.fromisoformat(date_iso),
-                time(
-                    *[
-                        int(num.text.decode("UTF-8"))
-                        for num in b.children
-                        if num.type == "number"
-                    ][3:]
-                ),
-            )
-            for b in booking_times_raw
+            datetime.combine(day, time(int(h), int(m), int(s)))
+            for *_, h, m, s in _DATE_RE.findall(events)
         ]
-        # Construct CourtBooking objects
-        while booking_times:
-            end = booking_times.pop()
-            start = booking_times.pop()
+        # Consecutive times give the start and end of each booking.
+        for start, end in zip(booking_times[::2], booking_times[1::2]):
             bookings.append(
                 CourtBooking(
                     location=location,
-                    court_name=court_id_to_names[court_id],
+                    court_name=court_name,
                     start=start,
                     end=end,
                 )
@@ -113,34 +158,48 @@ def scrape_bookings(location: Location, date_iso: str):
     return bookings
 
 
-def invert_bookings(bookings: list[CourtBooking]) -> list[CourtAvailability]:
+def invert_bookings(
+    bookings: list[CourtBooking],
+    time_range: TimeRangeFilter | None = None,
+    duration: DurationFilter | None = None,
+) -> list[CourtAvailability]:
     """
     Get available time slots given the bookings (from `scrape_bookings`).
 
     :param bookings: A list of court bookings.
     :type bookings: list[CourtBooking]
+    :param time_range: If given, availabilities are truncated to this time range
+                       and those outside of it are dropped.
+    :type time_range: TimeRangeFilter | None
+    :param duration: If given, availabilities shorter than the minimum duration
+                     are dropped.
+    :type duration: DurationFilter | None
     :return: An "inverted" list of court availabilities corresponding to the
              spaces in-between the bookings.
     :rtype: list[CourtAvailability]
     """
-    availabilities = []
-    courts = set([b.court_name for b in bookings])
+    # Group the bookings by court.
+    by_court = defaultdict(list)
+    for b in bookings:
+        by_court[b.court_name].append(b)
     # For each court, we extract the spaces between bookings.
-    for court in courts:
-        court_bookings = [b for b in bookings if b.court_name == court]
+    availabilities = []
+    for court, court_bookings in by_court.items():
         # Sort by starting time. We assume here that they never overlap, which
         # should always hold.
         court_bookings.sort(key=lambda b: b.start)
-        later = court_bookings.pop()
-        while court_bookings:
-            earlier = court_bookings.pop()
+        for earlier, later in zip(court_bookings, court_bookings[1:]):
+            # Apply the filters before constructing the availability.
+            window = filter_window(earlier.end, later.start, time_range, duration)
+            if window is None:
+                continue
+            start, end = window
             availabilities.append(
                 CourtAvailability(
-                    start=earlier.end,
-                    end=later.start,
+                    start=start,
+                    end=end,
                     court_name=court,
                     location=earlier.location,
                 )
             )
-            later = earlier
     return availabilities